@@ -1,519 +1,535 @@
 #!/usr/bin/env python3
 
-import collections
-import enum
+import dataclasses
+import heapq
 
 
-class Tile(enum.Enum):
-    WATER = 1
-    LAND = 2
-    GRILL = 3
+# Tile codes. Plain ints avoid Enum.__eq__ dispatch on every tile
+# comparison in the search.
+WATER = 1
+LAND = 2
+GRILL = 3
 
+# Display bytes indexed by tile code.
+TILE_BYTE = bytes([0, ord(" "), ord("#"), ord("!")])
 
-class Direction(enum.Enum):
-    UP = (0, 1)
-    DOWN = (0, -1)
-    LEFT = (-1, 0)
-    RIGHT = (1, 0)
+# Directions, as indexes into DIR_DELTA.
+DIR_UP = 0
+DIR_DOWN = 1
+DIR_LEFT = 2
+DIR_RIGHT = 3
+DIR_DELTA = ((0, 1), (0, -1), (-1, 0), (1, 0))
 
+# Sausage orientations, doubling as indexes into ORIENT_OFFSET, the
+# offset from a sausage's anchor cell to its second cell.
+HORIZONTAL = 0
+VERTICAL = 1
+ORIENT_OFFSET = ((1, 0), (0, 1))
 
-class SausageOrientation(enum.Enum):
-    HORIZONTAL = 1
-    VERTICAL = 2
 
+@dataclasses.dataclass(frozen=True, slots=True)
+class PlayerState:
+    pos: tuple
+    direction: int
 
-class PlayerState(collections.namedtuple(
-    "PlayerState",
-    ["pos",
-     "direction"]
-)):
-    __slots__ = ()
 
+# A sausage is packed into a single int: the four grill bits in the
+# low nibble, the orientation in bit 4, and the position in bits 5-9
+# (x) and 10-14 (y). Ints hash and compare at C speed, which matters
+# because every closed_set/g_score lookup hashes the whole state.
+GRILLED_BOTTOM_1 = 1 << 0
+GRILLED_BOTTOM_2 = 1 << 1
+GRILLED_TOP_1 = 1 << 2
+GRILLED_TOP_2 = 1 << 3
+GRILLED_ALL = 0xF
+ORIENTATION_VERTICAL = 1 << 4
+SAUSAGE_X_SHIFT = 5
+SAUSAGE_Y_SHIFT = 10
+SAUSAGE_COORD_MASK = 0x1F
 
-class SausageState(collections.namedtuple(
-    "SausageState",
-    ["orientation",
-     "pos",
-     "grilled_bottom_1",
-     "grilled_bottom_2",
-     "grilled_top_1",
-     "grilled_top_2"]
-)):
-    __slots__ = ()
 
-    def grilled_count(self):
-        return (self.grilled_bottom_1 + self.grilled_bottom_2 +
-                self.grilled_top_1 + self.grilled_top_2)
+def make_sausage(orientation, pos):
+    return ((orientation << 4) |
+            (pos[0] << SAUSAGE_X_SHIFT) |
+            (pos[1] << SAUSAGE_Y_SHIFT))
 
 
-class GameState(collections.namedtuple(
-    "GameState",
-    ["player_state",  # PlayerState
-     "sausage_states"]  # Tuple of SausageState
-)):
-    __slots__ = ()
+def sausage_pos(sausage):
+    return ((sausage >> SAUSAGE_X_SHIFT) & SAUSAGE_COORD_MASK,
+            (sausage >> SAUSAGE_Y_SHIFT) & SAUSAGE_COORD_MASK)
 
-    def grilled_count(self):
-        return sum(s.grilled_count() for s in self.sausage_states)
+
+# The player fits in 12 bits: x in bits 0-4, y in bits 5-9, and the
+# direction in bits 10-11. Concatenating that with the packed sausages
+# gives a single int for the whole game state, so the search sets and
+# score tables hash one machine word instead of nested namedtuples.
+PLAYER_Y_SHIFT = 5
+PLAYER_DIR_SHIFT = 10
+PLAYER_BITS = 12
+SAUSAGE_BITS = 15
+
+
+def encode_state(state):
+    player_state = state.player_state
+    key = (player_state.pos[0] |
+           (player_state.pos[1] << PLAYER_Y_SHIFT) |
+           (player_state.direction << PLAYER_DIR_SHIFT))
+    shift = PLAYER_BITS
+    for s in state.sausage_states:
+        key |= s << shift
+        shift += SAUSAGE_BITS
+    return key
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GameState:
+    player_state: PlayerState
+    sausage_states: tuple  # packed sausage ints, sorted
 
 
 class Level:
     def __init__(self, name, player_pos, player_dir, tiles, initial_sausages):
         self.name = name
-        self.tiles = tiles
+        # Flatten the nested tile lists into one bytes buffer indexed
+        # as x * height + y, so tile reads are a single C-level index
+        # and comparisons are against plain ints.
+        self.width = len(tiles)
+        self.height = len(tiles[0])
+        self.tiles_flat = bytes(t for column in tiles for t in column)
+        # Per-type bitmasks over the board: bit x * height + y is set
+        # when that tile has the given type, so a tile test on the
+        # search path is a single shift-and-mask. Off-board cells get
+        # no bit anywhere and so test as water against solid_mask.
+        self.water_mask = 0
+        self.land_mask = 0
+        self.grill_mask = 0
+        for index, code in enumerate(self.tiles_flat):
+            if code == WATER:
+                self.water_mask |= 1 << index
+            elif code == LAND:
+                self.land_mask |= 1 << index
+            elif code == GRILL:
+                self.grill_mask |= 1 << index
+        self.solid_mask = self.land_mask | self.grill_mask
+        # For every cell, the tile code one step away in each
+        # direction, with off-board steps reading as water. All four
+        # move candidates for a player position are then classified
+        # with plain table reads instead of per-candidate index math.
+        self.step_tile = bytearray(self.width * self.height * 4)
+        for x in range(self.width):
+            for y in range(self.height):
+                for direction, (dx, dy) in enumerate(DIR_DELTA):
+                    nx = x + dx
+                    ny = y + dy
+                    if 0 <= nx < self.width and 0 <= ny < self.height:
+                        code = self.tiles_flat[nx * self.height + ny]
+                    else:
+                        code = WATER
+                    self.step_tile[(x * self.height + y) * 4 +
+                                   direction] = code
+        # Manhattan distance from every cell to the nearest grill
+        # tile, for the search heuristic. Boards are tiny, so brute
+        # force over all cell pairs is fine.
+        grill_cells = [divmod(index, self.height)
+                       for index, code in enumerate(self.tiles_flat)
+                       if code == GRILL]
+        self.grill_dist = bytes(
+            min(abs(x - gx) + abs(y - gy) for gx, gy in grill_cells)
+            for x in range(self.width) for y in range(self.height))
+        # Sausage tuples are kept sorted so that physically identical
+        # configurations reached through different move orders compare
+        # and hash as the same state.
         self.initial_state = GameState(
             PlayerState(player_pos, player_dir),
-            tuple(initial_sausages)
+            tuple(sorted(initial_sausages))
         )
-
-    def get_tile(self, x, y):
-        if x < 0:
-            return Tile.WATER
-        if y < 0:
-            return Tile.WATER
-        if x >= len(self.tiles):
-            return Tile.WATER
-        if y >= len(self.tiles[0]):
-            return Tile.WATER
-        return self.tiles[x][y]
+        self._neighbors_cache = {}
+        self._moves_cache = {}
+        # Scratch buffers reused across process_pushes calls, so the
+        # hot path never reallocates them per candidate move. Safe
+        # because process_pushes runs to completion before the next
+        # call starts.
+        self._push_scratch = []
+        self._lookup_scratch = bytearray(b"\xff") * (self.width *
+                                                     self.height)
+        self._lookup_touched = []
+        self._sausage_pushes = [None] * len(initial_sausages)
+
+    def tile_bit(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return 1 << (x * self.height + y)
+        return 0
+
+    def _draw_tiles(self):
+        # Fill one preallocated buffer with a newline-terminated row
+        # per y coordinate, top row first, instead of building O(W*H)
+        # single-character strings.
+        stride = self.width + 1
+        buf = bytearray(stride * self.height)
+        for y in range(self.height):
+            row_start = (self.height - 1 - y) * stride
+            for x in range(self.width):
+                buf[row_start + x] = TILE_BYTE[
+                    self.tiles_flat[x * self.height + y]]
+            buf[row_start + self.width] = ord("\n")
+        return buf
 
     def draw_level(self):
-        return "\n".join(
-            "".join(
-                {
-                    Tile.WATER: " ",
-                    Tile.LAND: "#",
-                    Tile.GRILL: "!"
-                }[self.tiles[x][y]] for x in range(len(self.tiles))
-            ) for y in range(len(self.tiles[0]))[::-1]
-        )
+        return self._draw_tiles()[:-1].decode("ascii")
 
     def draw_state(self, state):
-        def draw_tile(x, y):
-            if (state.player_state.pos[0] == x and
-                    state.player_state.pos[1] == y):
-                return "@"
-            if state.player_state.direction == Direction.UP:
-                if (state.player_state.pos[0] == x and
-                        state.player_state.pos[1] + 1 == y):
-                    return "%"
-            elif state.player_state.direction == Direction.DOWN:
-                if (state.player_state.pos[0] == x and
-                        state.player_state.pos[1] - 1 == y):
-                    return "%"
-            elif state.player_state.direction == Direction.LEFT:
-                if (state.player_state.pos[0] - 1 == x and
-                        state.player_state.pos[1] == y):
-                    return "%"
-            elif state.player_state.direction == Direction.RIGHT:
-                if (state.player_state.pos[0] + 1 == x and
-                        state.player_state.pos[1] == y):
-                    return "%"
-            for s in state.sausage_states:
-                if s.orientation == SausageOrientation.HORIZONTAL:
-                    if ((s.pos[0] == x or s.pos[0] + 1 == x) and
-                            s.pos[1] == y):
-                        return "*"
-                else:
-                    if (s.pos[0] == x and
-                            (s.pos[1] == y or s.pos[1] + 1 == y)):
-                        return "*"
-            return {
-                Tile.WATER: " ",
-                Tile.LAND: "#",
-                Tile.GRILL: "!"
-            }[self.tiles[x][y]]
-        return "\n".join(
-            "".join(
-                draw_tile(x, y) for x in range(len(self.tiles))
-            ) for y in range(len(self.tiles[0]))[::-1]
-        )
+        stride = self.width + 1
+        buf = self._draw_tiles()
+
+        def write(x, y, byte):
+            buf[(self.height - 1 - y) * stride + x] = byte
+
+        # Overwrite in reverse precedence order: sausages, then the
+        # fork, then the player.
+        for s in state.sausage_states:
+            sx, sy = sausage_pos(s)
+            write(sx, sy, ord("*"))
+            if not s & ORIENTATION_VERTICAL:
+                write(sx + 1, sy, ord("*"))
+            else:
+                write(sx, sy + 1, ord("*"))
+        px, py = state.player_state.pos
+        dx, dy = DIR_DELTA[state.player_state.direction]
+        write(px + dx, py + dy, ord("%"))
+        write(px, py, ord("@"))
+        return buf[:-1].decode("ascii")
 
     def is_winning(self, state):
-        for sausage_state in state.sausage_states:
-            if (sausage_state.grilled_bottom_1 and
-                    sausage_state.grilled_bottom_2 and
-                    sausage_state.grilled_top_1 and
-                    sausage_state.grilled_top_2):
-                continue
-            else:
-                return False
-        return state.player_state == self.initial_state.player_state
+        return (state.player_state == self.initial_state.player_state and
+                all(s & GRILLED_ALL == GRILLED_ALL
+                    for s in state.sausage_states))
 
     def solve(self):
-        def heuristic_cost_estimate(state):
-            sausage_count = len(state.sausage_states)
-            grilled_count = state.grilled_count()
-            return 100 * (4 * sausage_count - grilled_count)
-
-        closed_set = set()
-        open_set = set((self.initial_state,))
-        step_lookup = {}
-        g_score = collections.defaultdict(lambda: float("inf"))
-        g_score[self.initial_state] = 0
-        f_score = collections.defaultdict(lambda: float("inf"))
-        heuristic_initial_cost = heuristic_cost_estimate(self.initial_state)
-        f_score[self.initial_state] = heuristic_initial_cost
-        while open_set:
-            current = None
-            current_score = float("inf")
-            for s in open_set:
-                if f_score[s] <= current_score:
-                    current = s
-                    current_score = f_score[s]
-
-            if self.is_winning(current):
+        initial_key = encode_state(self.initial_state)
+        inf = float("inf")
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        neighbors = self.neighbors
+        encode = encode_state
+        # The packed key already contains every sausage's grill nibble
+        # at a fixed offset, plus the player bits, so "all grilled and
+        # back at the start" is one mask-and-compare per popped state.
+        player_mask = (1 << PLAYER_BITS) - 1
+        win_mask = player_mask
+        win_target = initial_key & player_mask
+        shift = PLAYER_BITS
+        for _ in self.initial_state.sausage_states:
+            win_mask |= GRILLED_ALL << shift
+            win_target |= GRILLED_ALL << shift
+            shift += SAUSAGE_BITS
+        # The grill-count part of the heuristic is a pure function of
+        # those same grill nibbles: 100 per face still ungrilled.
+        # Masking the key and counting the set bits computes it
+        # inline, with no per-sausage loop. On top of that, a player
+        # with work left to do is at least its Manhattan distance from
+        # the nearest grill away from grilling anything, and once all
+        # faces are done it still has to walk home, so each case adds
+        # the matching distance as a tie-breaking lower-bound term.
+        grill_mask = win_mask & ~player_mask
+        grill_target = win_target & ~player_mask
+        h_full = 100 * 4 * len(self.initial_state.sausage_states)
+        grill_dist = self.grill_dist
+        height = self.height
+        home_x, home_y = self.initial_state.player_state.pos
+        # States are interned to dense int ids on first discovery, so
+        # the per-state tables are plain lists indexed by id and only
+        # state_to_id still hashes the packed key. Heap entries are
+        # (f, -g, id): ties on f are broken toward the higher g score,
+        # i.e. toward states deeper along their path, which expands
+        # fewer frontier nodes, and the id makes entries distinct
+        # without a separate tie counter. Whether a state is worth
+        # pushing is answered entirely by the g-score test, so no
+        # open-membership bookkeeping is needed. Closed states flip
+        # their g-score entry to -g - 1; since every tentative g is
+        # positive, the ordinary dominance comparison then also skips
+        # closed neighbors, and there is no separate closed table.
+        heuristic_initial_cost = (
+            h_full - 100 * (initial_key & grill_mask).bit_count() +
+            grill_dist[home_x * height + home_y])
+        state_to_id = {initial_key: 0}
+        id_to_state = [self.initial_state]
+        id_to_key = [initial_key]
+        came_from = [-1]
+        g_score = [0]
+        f_score = [heuristic_initial_cost]
+        open_heap = [(heuristic_initial_cost, 0, 0)]
+        while open_heap:
+            f, _, current_id = heappop(open_heap)
+            current_g = g_score[current_id]
+            if current_g < 0:
+                # Already closed.
+                continue
+            if f != f_score[current_id]:
+                # A stale entry: this state was relaxed again after it
+                # was pushed, and the better entry is still queued.
+                continue
+
+            current_key = id_to_key[current_id]
+            if current_key & win_mask == win_target:
                 print("Succeeded")
-                back = current
                 states = []
-                while back in step_lookup:
-                    states.insert(0, back)
-                    back = step_lookup[back]
+                back_id = current_id
+                while back_id != 0:
+                    states.append(id_to_state[back_id])
+                    back_id = came_from[back_id]
+                states.reverse()
                 return states
 
-            open_set.remove(current)
-            closed_set.add(current)
-
-            for neighbor in self.neighbors(current):
-                if neighbor in closed_set:
-                    continue
-                if neighbor not in open_set:
-                    open_set.add(neighbor)
-
-                tentative_g_score = g_score[current] + 1
-                if tentative_g_score >= g_score[neighbor]:
+            g_score[current_id] = -current_g - 1
+            current = id_to_state[current_id]
+            tentative_g_score = current_g + 1
+
+            for neighbor in neighbors(current, current_key):
+                neighbor_key = encode(neighbor)
+                neighbor_id = state_to_id.get(neighbor_key)
+                if neighbor_id is None:
+                    neighbor_id = len(id_to_state)
+                    state_to_id[neighbor_key] = neighbor_id
+                    id_to_state.append(neighbor)
+                    id_to_key.append(neighbor_key)
+                    came_from.append(-1)
+                    g_score.append(inf)
+                    f_score.append(inf)
+
+                # Closed neighbors have a negative g-score entry, so
+                # this one comparison rejects them along with the
+                # merely dominated.
+                if tentative_g_score >= g_score[neighbor_id]:
                     continue
 
-                step_lookup[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = (g_score[neighbor] +
-                                     heuristic_cost_estimate(neighbor))
+                came_from[neighbor_id] = current_id
+                g_score[neighbor_id] = tentative_g_score
+                grilled_bits = neighbor_key & grill_mask
+                npx, npy = neighbor.player_state.pos
+                if grilled_bits == grill_target:
+                    distance = abs(npx - home_x) + abs(npy - home_y)
+                else:
+                    distance = grill_dist[npx * height + npy]
+                neighbor_f = (tentative_g_score + h_full -
+                              100 * grilled_bits.bit_count() + distance)
+                f_score[neighbor_id] = neighbor_f
+                heappush(open_heap,
+                         (neighbor_f, -tentative_g_score, neighbor_id))
         print("Failed")
 
-    def neighbors(self, state):
-        yield from self.move_up(state)
-        yield from self.move_down(state)
-        yield from self.move_left(state)
-        yield from self.move_right(state)
-
-    def move_up(self, state):
-        pushes = []
-        old_pos = state.player_state.pos
-        if state.player_state.direction == Direction.UP:  # move forward
-            next_dir = Direction.UP
-            next_pos = (old_pos[0], old_pos[1] + 1)
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0], old_pos[1] + 2), (0, 1)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0], old_pos[1] + 2), (0, 1)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.DOWN:  # move backward
-            next_dir = Direction.DOWN
-            next_pos = (old_pos[0], old_pos[1] + 1)
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0], old_pos[1] + 1), (0, 1)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0], old_pos[1] + 1), (0, 1)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.LEFT:  # turn
-            next_dir = Direction.UP
-            pushes.append(((old_pos[0] - 1, old_pos[1] + 1), (0, 1)))
-            pushes.append(((old_pos[0], old_pos[1] + 1), (1, 0)))
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.RIGHT:  # turn
-            next_dir = Direction.UP
-            pushes.append(((old_pos[0] + 1, old_pos[1] + 1), (0, 1)))
-            pushes.append(((old_pos[0], old_pos[1] + 1), (-1, 0)))
-            next_pos = old_pos
-        yield from self.process_pushes(state, next_pos, next_dir, pushes)
-
-    def move_down(self, state):
-        pushes = []
-        old_pos = state.player_state.pos
-        if state.player_state.direction == Direction.UP:  # move backward
-            next_dir = Direction.UP
-            next_pos = (old_pos[0], old_pos[1] - 1)
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0], old_pos[1] - 1), (0, -1)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0], old_pos[1] - 1), (0, -1)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.DOWN:  # move forward
-            next_dir = Direction.DOWN
-            next_pos = (old_pos[0], old_pos[1] - 1)
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0], old_pos[1] - 2), (0, -1)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0], old_pos[1] - 2), (0, -1)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.LEFT:  # turn
-            next_dir = Direction.DOWN
-            pushes.append(((old_pos[0] - 1, old_pos[1] - 1), (0, -1)))
-            pushes.append(((old_pos[0], old_pos[1] - 1), (1, 0)))
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.RIGHT:  # turn
-            next_dir = Direction.DOWN
-            pushes.append(((old_pos[0] + 1, old_pos[1] - 1), (0, -1)))
-            pushes.append(((old_pos[0], old_pos[1] - 1), (-1, 0)))
-            next_pos = old_pos
-        yield from self.process_pushes(state, next_pos, next_dir, pushes)
-
-    def move_left(self, state):
-        pushes = []
-        old_pos = state.player_state.pos
-        if state.player_state.direction == Direction.UP:  # turn
-            next_dir = Direction.LEFT
-            pushes.append(((old_pos[0] - 1, old_pos[1] + 1), (-1, 0)))
-            pushes.append(((old_pos[0] - 1, old_pos[1]), (0, -1)))
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.DOWN:  # turn
-            next_dir = Direction.LEFT
-            pushes.append(((old_pos[0] - 1, old_pos[1] - 1), (-1, 0)))
-            pushes.append(((old_pos[0] - 1, old_pos[1]), (0, 1)))
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.LEFT:  # move forward
-            next_dir = Direction.LEFT
-            next_pos = (old_pos[0] - 1, old_pos[1])
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0] - 2, old_pos[1]), (-1, 0)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0] - 2, old_pos[1]), (-1, 0)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.RIGHT:  # move backward
-            next_dir = Direction.RIGHT
-            next_pos = (old_pos[0] - 1, old_pos[1])
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0] - 1, old_pos[1]), (-1, 0)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0] - 1, old_pos[1]), (-1, 0)))
-                next_pos = old_pos
-        yield from self.process_pushes(state, next_pos, next_dir, pushes)
-
-    def move_right(self, state):
-        pushes = []
+    # Player moves are table-driven: each (facing, action) pair is one
+    # of three kinds. "forward" steps toward the action direction and
+    # pushes two tiles ahead, "backward" steps the same way while the
+    # player keeps facing the other way and pushes one tile ahead, and
+    # "turn" leaves the player in place while the fork sweeps from the
+    # facing direction around to the action direction.
+    _DISPATCH = (
+        "forward", "backward", "turn", "turn",      # facing up
+        "backward", "forward", "turn", "turn",      # facing down
+        "turn", "turn", "forward", "backward",      # facing left
+        "turn", "turn", "backward", "forward",      # facing right
+    )
+
+    # Cap on memoized successor sets, to bound memory on levels whose
+    # search space outgrows the cache's usefulness.
+    _NEIGHBORS_CACHE_LIMIT = 1 << 18
+
+    def neighbors(self, state, state_key=None):
+        # The cache keys on the packed state int; the search loop
+        # passes the key it already has, so no GameState is hashed on
+        # the hot path.
+        if state_key is None:
+            state_key = encode_state(state)
+        cached = self._neighbors_cache.get(state_key)
+        if cached is None:
+            cached = tuple(self._expand(state))
+            if len(self._neighbors_cache) >= self._NEIGHBORS_CACHE_LIMIT:
+                self._neighbors_cache.clear()
+            self._neighbors_cache[state_key] = cached
+        return cached
+
+    def _expand(self, state):
         old_pos = state.player_state.pos
-        if state.player_state.direction == Direction.UP:  # turn
-            next_dir = Direction.RIGHT
-            pushes.append(((old_pos[0] + 1, old_pos[1] + 1), (1, 0)))
-            pushes.append(((old_pos[0] + 1, old_pos[1]), (0, -1)))
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.DOWN:  # turn
-            pushes.append(((old_pos[0] + 1, old_pos[1] - 1), (1, 0)))
-            pushes.append(((old_pos[0] + 1, old_pos[1]), (0, 1)))
-            next_dir = Direction.RIGHT
-            next_pos = old_pos
-        elif state.player_state.direction == Direction.LEFT:  # move backward
-            next_dir = Direction.LEFT
-            next_pos = (old_pos[0] + 1, old_pos[1])
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
-                next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0] + 1, old_pos[1]), (1, 0)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0] + 1, old_pos[1]), (1, 0)))
-                next_pos = old_pos
-        elif state.player_state.direction == Direction.RIGHT:  # move forward
-            next_dir = Direction.RIGHT
-            next_pos = (old_pos[0] + 1, old_pos[1])
-            next_tile = self.tiles[next_pos[0]][next_pos[1]]
-            if next_tile == Tile.WATER:
+        facing = state.player_state.direction
+        moves = self._moves_cache.get((facing, old_pos))
+        if moves is None:
+            moves = self._compute_moves(facing, old_pos)
+            self._moves_cache[(facing, old_pos)] = moves
+        process_pushes = self.process_pushes
+        for next_pos, next_dir, pushes in moves:
+            successor = process_pushes(state, next_pos, next_dir, pushes)
+            if successor is not None:
+                yield successor
+
+    def _compute_moves(self, facing, old_pos):
+        # The geometry of the four candidate moves depends only on the
+        # player placement and the tiles, not on the sausages, so the
+        # results are cached per (facing, pos). The cache saturates at
+        # four entries per cell and needs no size cap.
+        step_base = (old_pos[0] * self.height + old_pos[1]) * 4
+        moves = []
+        for action in (DIR_UP, DIR_DOWN, DIR_LEFT, DIR_RIGHT):
+            kind = self._DISPATCH[facing * 4 + action]
+            ax, ay = DIR_DELTA[action]
+            pushes = []
+            if kind == "turn":
+                fx, fy = DIR_DELTA[facing]
+                next_dir = action
                 next_pos = old_pos
-            elif next_tile == Tile.LAND:
-                pushes.append(((old_pos[0] + 2, old_pos[1]), (1, 0)))
-            elif next_tile == Tile.GRILL:
-                pushes.append(((old_pos[0] + 2, old_pos[1]), (1, 0)))
-                next_pos = old_pos
-        yield from self.process_pushes(state, next_pos, next_dir, pushes)
+                pushes.append(((old_pos[0] + fx + ax, old_pos[1] + fy + ay),
+                               (ax, ay)))
+                pushes.append(((old_pos[0] + ax, old_pos[1] + ay),
+                               (-fx, -fy)))
+            else:
+                next_dir = facing
+                next_pos = (old_pos[0] + ax, old_pos[1] + ay)
+                next_tile = self.step_tile[step_base + action]
+                if kind == "forward":
+                    push_pos = (old_pos[0] + 2 * ax, old_pos[1] + 2 * ay)
+                else:  # backward
+                    push_pos = next_pos
+                if next_tile == WATER:
+                    next_pos = old_pos
+                elif next_tile == LAND:
+                    pushes.append((push_pos, (ax, ay)))
+                elif next_tile == GRILL:
+                    pushes.append((push_pos, (ax, ay)))
+                    next_pos = old_pos
+            moves.append((next_pos, next_dir, tuple(pushes)))
+        return tuple(moves)
 
     def process_pushes(self, state, next_pos, next_dir, pushes):
-        sausage_lookup = collections.defaultdict(lambda: None)
+        width = self.width
+        height = self.height
+        # Board-sized occupancy table of sausage indexes (255 means
+        # empty), so push probes are array reads instead of hashed
+        # dict lookups. Sausage cells themselves are always on the
+        # board because the levels keep a water border; only probe
+        # positions need a bounds check. The buffer persists between
+        # calls: only the cells the previous call marked get reset.
+        sausage_lookup = self._lookup_scratch
+        touched = self._lookup_touched
+        for index in touched:
+            sausage_lookup[index] = 255
+        touched.clear()
         for i, s in enumerate(state.sausage_states):
-                sausage_lookup[s.pos] = i
-                if s.orientation == SausageOrientation.HORIZONTAL:
-                    sausage_lookup[(s.pos[0] + 1, s.pos[1])] = i
-                else:
-                    sausage_lookup[(s.pos[0], s.pos[1] + 1)] = i
-        sausage_pushes = [None for _ in state.sausage_states]
-
+            sx, sy = sausage_pos(s)
+            ox, oy = ORIENT_OFFSET[(s >> 4) & 1]
+            index = sx * height + sy
+            sausage_lookup[index] = i
+            touched.append(index)
+            index = (sx + ox) * height + sy + oy
+            sausage_lookup[index] = i
+            touched.append(index)
+        sausage_pushes = self._sausage_pushes
+        for i in range(len(sausage_pushes)):
+            sausage_pushes[i] = None
+
+        # The incoming pushes are a cached tuple shared between
+        # states; copy into the reusable work list since propagation
+        # consumes and extends it.
+        work = self._push_scratch
+        work.clear()
+        work.extend(pushes)
+        pushes = work
         while pushes:
             push = pushes.pop()
-            sausage_index = sausage_lookup[push[0]]
-            if sausage_index is not None:
+            px, py = push[0]
+            if 0 <= px < width and 0 <= py < height:
+                sausage_index = sausage_lookup[px * height + py]
+            else:
+                sausage_index = 255
+            if sausage_index != 255:
                 sausage_pushes[sausage_index] = push
                 sausage = state.sausage_states[sausage_index]
-                if sausage.orientation == SausageOrientation.HORIZONTAL:
-                    if push[1][0] != 0:  # push lengthwise
-                        pushes.append(((push[0][0] + 2 * push[1][0],
-                                      push[0][1]), push[1]))
-                    else:  # roll
-                        pushes.append(((sausage.pos[0],
-                                      sausage.pos[1] + push[1][1]), push[1]))
-                        pushes.append(((sausage.pos[0] + 1,
-                                      sausage.pos[1] + push[1][1]), push[1]))
-                else:  # vertical sausage orientation
-                    if push[1][1] != 0:  # push lengthwise
-                        pushes.append(((push[0][0],
-                                      push[0][1] + 2 * push[1][1]), push[1]))
-                    else:  # roll
-                        pushes.append(((sausage.pos[0] + push[1][0],
-                                      sausage.pos[1]), push[1]))
-                        pushes.append(((sausage.pos[0] + push[1][0],
-                                      sausage.pos[1] + 1), push[1]))
+                sx, sy = sausage_pos(sausage)
+                dx, dy = push[1]
+                ox, oy = ORIENT_OFFSET[(sausage >> 4) & 1]
+                if dx * ox + dy * oy:  # push lengthwise
+                    pushes.append(((px + 2 * dx, py + 2 * dy), push[1]))
+                else:  # roll
+                    pushes.append(((sx + dx, sy + dy), push[1]))
+                    pushes.append(((sx + dx + ox, sy + dy + oy), push[1]))
 
         burned = False
         sunk = False
-        new_sausages = [None for _ in state.sausage_states]
-        for i, old_sausage in enumerate(state.sausage_states):
-            if sausage_pushes[i] is None:
-                new_sausages[i] = old_sausage
-            else:
-                push = sausage_pushes[i]
-                sx = old_sausage.pos[0] + push[1][0]
-                sy = old_sausage.pos[1] + push[1][1]
-                if sausage.orientation == SausageOrientation.HORIZONTAL:
-                    if push[1][0] != 0:  # push lengthwise
-                        newgb1 = sausage.grilled_bottom_1
-                        newgb2 = sausage.grilled_bottom_2
-                        newgt1 = sausage.grilled_top_1
-                        newgt2 = sausage.grilled_top_2
-                    else:  # roll
-                        newgb1 = sausage.grilled_top_1
-                        newgb2 = sausage.grilled_top_2
-                        newgt1 = sausage.grilled_bottom_1
-                        newgt2 = sausage.grilled_bottom_2
-                    if self.get_tile(sx, sy) == Tile.GRILL:
-                        if newgb1:
-                            burned = True
-                            break
-                        newgb1 = True
-                    if self.get_tile(sx + 1, sy) == Tile.GRILL:
-                        if newgb2:
-                            burned = True
-                            break
-                        newgb2 = True
-                    if (self.get_tile(sx, sy) == Tile.WATER and
-                            self.get_tile(sx + 1, sy) == Tile.WATER):
-                        sunk = True
-                        break
-                else:  # vertical sausage orientation
-                    if push[1][1] != 0:  # push lengthwise
-                        newgb1 = sausage.grilled_bottom_1
-                        newgb2 = sausage.grilled_bottom_2
-                        newgt1 = sausage.grilled_top_1
-                        newgt2 = sausage.grilled_top_2
-                    else:  # roll
-                        newgb1 = sausage.grilled_top_1
-                        newgb2 = sausage.grilled_top_2
-                        newgt1 = sausage.grilled_bottom_1
-                        newgt2 = sausage.grilled_bottom_2
-                    if self.get_tile(sx, sy) == Tile.GRILL:
-                        if newgb1:
-                            burned = True
-                            break
-                        newgb1 = True
-                    if self.get_tile(sx, sy + 1) == Tile.GRILL:
-                        if newgb2:
-                            burned = True
-                            break
-                        newgb2 = True
-                    if (self.get_tile(sx, sy) == Tile.WATER and
-                            self.get_tile(sx, sy + 1) == Tile.WATER):
-                        sunk = True
-                        break
-                new_sausages[i] = SausageState(
-                    old_sausage.orientation,
-                    (
-                        old_sausage.pos[0] + push[1][0],
-                        old_sausage.pos[1] + push[1][1]
-                    ),
-                    newgb1,
-                    newgb2,
-                    newgt1,
-                    newgt2
-                )
-        if not burned and not sunk:
-            yield GameState(
-                PlayerState(next_pos, next_dir),
-                tuple(new_sausages)
-            )
+        tile_bit = self.tile_bit
+        grill_mask = self.grill_mask
+        solid_mask = self.solid_mask
+        # Unpushed sausages carry over unchanged, so start from a copy
+        # and only rewrite the entries that actually moved; most moves
+        # push at most one sausage.
+        new_sausages = list(state.sausage_states)
+        for i, push in enumerate(sausage_pushes):
+            if push is None:
+                continue
+            old_sausage = new_sausages[i]
+            dx, dy = push[1]
+            old_x, old_y = sausage_pos(old_sausage)
+            sx = old_x + dx
+            sy = old_y + dy
+            ox, oy = ORIENT_OFFSET[(old_sausage >> 4) & 1]
+            if dx * ox + dy * oy:  # push lengthwise
+                new_grill_bits = old_sausage & GRILLED_ALL
+            else:  # roll swaps the top and bottom bits
+                new_grill_bits = (((old_sausage & 0x3) << 2) |
+                                  ((old_sausage >> 2) & 0x3))
+            bit_1 = tile_bit(sx, sy)
+            bit_2 = tile_bit(sx + ox, sy + oy)
+            if grill_mask & bit_1:
+                if new_grill_bits & GRILLED_BOTTOM_1:
+                    burned = True
+                    break
+                new_grill_bits |= GRILLED_BOTTOM_1
+            if grill_mask & bit_2:
+                if new_grill_bits & GRILLED_BOTTOM_2:
+                    burned = True
+                    break
+                new_grill_bits |= GRILLED_BOTTOM_2
+            if not solid_mask & (bit_1 | bit_2):
+                sunk = True
+                break
+            new_sausages[i] = ((old_sausage & ORIENTATION_VERTICAL) |
+                               (sx << SAUSAGE_X_SHIFT) |
+                               (sy << SAUSAGE_Y_SHIFT) |
+                               new_grill_bits)
+        if burned or sunk:
+            return None
+        return GameState(
+            PlayerState(next_pos, next_dir),
+            tuple(sorted(new_sausages))
+        )
 
 
 BAYS_NECK = Level(
     "Bay's Neck",
     (4, 2),
-    Direction.LEFT,
-    [[Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER],
-     [Tile.WATER, Tile.LAND, Tile.LAND, Tile.WATER, Tile.LAND, Tile.WATER],
-     [Tile.WATER, Tile.LAND, Tile.GRILL, Tile.LAND, Tile.LAND, Tile.WATER],
-     [Tile.WATER, Tile.LAND, Tile.LAND, Tile.WATER, Tile.GRILL, Tile.WATER],
-     [Tile.WATER, Tile.WATER, Tile.LAND, Tile.LAND, Tile.LAND, Tile.WATER],
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER]],
-    [SausageState(
-        SausageOrientation.VERTICAL,
-        (1, 1),
-        False,
-        False,
-        False,
-        False
-     )]
+    DIR_LEFT,
+    [[WATER, WATER, WATER, WATER, WATER, WATER],
+     [WATER, LAND, LAND, WATER, LAND, WATER],
+     [WATER, LAND, GRILL, LAND, LAND, WATER],
+     [WATER, LAND, LAND, WATER, GRILL, WATER],
+     [WATER, WATER, LAND, LAND, LAND, WATER],
+     [WATER, WATER, WATER, WATER, WATER, WATER]],
+    [make_sausage(VERTICAL, (1, 1))]
 )
 
 THE_CLOVER = Level(
     "The Clover",
     (1, 4),
-    Direction.RIGHT,
-    [[Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER],      # noqa
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.LAND, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER],       # noqa
-     [Tile.WATER, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.LAND, Tile.WATER],         # noqa
-     [Tile.WATER, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.LAND, Tile.WATER],         # noqa
-     [Tile.WATER, Tile.LAND, Tile.LAND, Tile.LAND, Tile.LAND, Tile.WATER, Tile.WATER, Tile.LAND, Tile.WATER],           # noqa
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.WATER, Tile.LAND, Tile.WATER],        # noqa
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.LAND, Tile.GRILL, Tile.GRILL, Tile.WATER, Tile.LAND, Tile.WATER],        # noqa
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.LAND, Tile.LAND, Tile.LAND, Tile.LAND, Tile.LAND, Tile.WATER],           # noqa
-     [Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER, Tile.WATER]],     # noqa
-    [SausageState(
-        SausageOrientation.HORIZONTAL,
-        (2, 1),
-        False,
-        False,
-        False,
-        False
-     ),
-     SausageState(
-        SausageOrientation.VERTICAL,
-        (7, 4),
-        False,
-        False,
-        False,
-        False
-     ),
-     SausageState(
-        SausageOrientation.HORIZONTAL,
-        (2, 7),
-        False,
-        False,
-        False,
-        False
-     )]
+    DIR_RIGHT,
+    [[WATER, WATER, WATER, WATER, WATER, WATER, WATER, WATER, WATER],
+     [WATER, WATER, WATER, WATER, LAND, WATER, WATER, WATER, WATER],
+     [WATER, LAND, GRILL, GRILL, LAND, GRILL, GRILL, LAND, WATER],
+     [WATER, LAND, GRILL, GRILL, LAND, GRILL, GRILL, LAND, WATER],
+     [WATER, LAND, LAND, LAND, LAND, WATER, WATER, LAND, WATER],
+     [WATER, WATER, WATER, LAND, GRILL, GRILL, WATER, LAND, WATER],
+     [WATER, WATER, WATER, LAND, GRILL, GRILL, WATER, LAND, WATER],
+     [WATER, WATER, WATER, LAND, LAND, LAND, LAND, LAND, WATER],
+     [WATER, WATER, WATER, WATER, WATER, WATER, WATER, WATER, WATER]],
+    [make_sausage(HORIZONTAL, (2, 1)),
+     make_sausage(VERTICAL, (7, 4)),
+     make_sausage(HORIZONTAL, (2, 7))]
 )
 
 